@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
+import os
 import sqlite3
-from datetime import datetime, date, timedelta
-from io import BytesIO
+import threading
+import xlsxwriter
+from datetime import datetime, timedelta, timezone
+from io import BytesIO, StringIO
+from itertools import chain
 
 DB_FILE = "belaz.db"
 LOGO_URL = "https://agmk.uz/uploads/news/3a1b485c044e3d563acdd095d26ee287.jpg"
+LOGO_FILE = "logo.jpg"
 ADMIN_CODE = "shjsh707"
 
 # maxsus belgi – Ж/Р rejimi
@@ -16,87 +21,178 @@ OTVAL_JR = "__J_R__"
 #  Vaqt (Toshkent UTC+5)
 # =======================
 
+TASHKENT_TZ = timezone(timedelta(hours=5))
+
+
 def get_now_tashkent():
-    """Server UTC bo'lsa ham, bu yerda +5 soat qo'shib Toshkent vaqti qilamiz."""
-    return datetime.utcnow() + timedelta(hours=5)
+    """Server UTC bo'lsa ham, Toshkent vaqti (naive – bazadagi ts formati o‘zgarmaydi)."""
+    return datetime.now(TASHKENT_TZ).replace(tzinfo=None)
+
+
+def get_ts_day():
+    """Toshkent vaqti bo‘yicha (ts, day): bitta formatlash, day – ts ning prefiksi."""
+    ts = get_now_tashkent().isoformat(sep=" ", timespec="seconds")
+    return ts, ts[:10]
 
 
 # =======================
 #  SQLite + jadvallar
 # =======================
 
+@st.cache_resource
 def get_connection():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    """Jarayon uchun bitta umumiy ulanish (har chaqiruvda qayta ochilmaydi)."""
+    # cached_statements: tayyorlangan SQL lar keshi (standart 128 dan kattaroq)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, cached_statements=256)
+    # Kichik natijalar uchun: ustunga nom bo‘yicha murojaat, pandas kerak emas
+    conn.row_factory = sqlite3.Row
+    # WAL + NORMAL: har INSERT da to'liq fsync bo'lmaydi
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-64000;")
+    conn.execute("PRAGMA mmap_size=268435456;")
+    conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # Hodkalar (BelAZ)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            day TEXT NOT NULL,
-            excavator TEXT NOT NULL,
-            otval TEXT NOT NULL,
-            truck_id INTEGER NOT NULL,
-            truck_class TEXT NOT NULL,
-            base_volume REAL NOT NULL,
-            factor REAL NOT NULL,
-            volume REAL NOT NULL
-        );
-        """
-    )
+@st.cache_resource
+def get_write_lock():
+    """
+    Yozuvlarni ketma-ket bajarish uchun ulanish bilan birga saqlanadigan qulf.
+    Yozuvchilar "with get_write_lock(), conn:" ishlatadi – xato bo‘lsa rollback,
+    aks holda commit (umumiy ulanishda yarim tranzaksiya qolib ketmaydi).
+    """
+    return threading.Lock()
 
-    # Otvallar (nom + km)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS otvals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            length REAL
-        );
-        """
-    )
 
-    # Zayavkalar
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS requests (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            day TEXT NOT NULL,
-            excavator TEXT NOT NULL,
-            text TEXT NOT NULL
-        );
-        """
-    )
+@st.cache_resource
+def init_db():
+    """Jadvallar/indekslarni yaratadi – jarayon uchun bir marta (har rerun da emas)."""
+    conn = get_connection()
 
-    # Ж/Р – lokomotiv bo‘yicha объём (UTT ga qo‘shilmaydi)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS jr_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            day TEXT NOT NULL,
-            loco TEXT NOT NULL,
-            volume REAL NOT NULL
-        );
-        """
-    )
+    # Butun sxema bitta executescript da
+    with get_write_lock():
+        conn.executescript(
+            """
+            -- Hodkalar (BelAZ)
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                day TEXT NOT NULL,
+                excavator TEXT NOT NULL,
+                otval TEXT NOT NULL,
+                truck_id INTEGER NOT NULL,
+                truck_class TEXT NOT NULL,
+                base_volume REAL NOT NULL,
+                factor REAL NOT NULL,
+                volume REAL NOT NULL
+            );
+
+            -- Kun bo‘yicha filtrlar uchun indekslar ((day) alohida kerak emas – prefiks yetadi).
+            -- ts oxirida – "ORDER BY ts" uchun vaqtinchalik saralash kerak bo‘lmaydi.
+            CREATE INDEX IF NOT EXISTS idx_records_day_exc_ts ON records(day, excavator, ts);
+            CREATE INDEX IF NOT EXISTS idx_records_day_ts ON records(day, ts);
+            -- Otval svodlari uchun qoplovchi indeks: GROUP BY otval, excavator + SUM(volume)
+            -- faqat indeksdan o‘qiladi (jadvalga murojaat va temp B-tree yo‘q)
+            CREATE INDEX IF NOT EXISTS idx_records_day_otval_exc_vol
+                ON records(day, otval, excavator, volume);
+
+            -- Kunlik agregat (day / exc / otval / truck_id) – records triggerlari yangilaydi,
+            -- shuning uchun bazada qo‘lda qilingan tuzatishlar (DELETE/UPDATE) ham aks etadi.
+            -- Eski bazada otval NULL bo‘lishi mumkin – '' sifatida hisoblanadi
+            CREATE TABLE IF NOT EXISTS daily_agg (
+                day TEXT NOT NULL,
+                excavator TEXT NOT NULL,
+                otval TEXT NOT NULL,
+                truck_id INTEGER NOT NULL,
+                trips INTEGER NOT NULL,
+                obem REAL NOT NULL,
+                PRIMARY KEY (day, excavator, otval, truck_id)
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_records_agg_insert AFTER INSERT ON records
+            BEGIN
+                INSERT INTO daily_agg (day, excavator, otval, truck_id, trips, obem)
+                VALUES (NEW.day, NEW.excavator, COALESCE(NEW.otval, ''), NEW.truck_id, 1, NEW.volume)
+                ON CONFLICT(day, excavator, otval, truck_id)
+                DO UPDATE SET trips = trips + 1, obem = obem + excluded.obem;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_records_agg_delete AFTER DELETE ON records
+            BEGIN
+                UPDATE daily_agg SET trips = trips - 1, obem = obem - OLD.volume
+                WHERE day = OLD.day AND excavator = OLD.excavator
+                  AND otval = COALESCE(OLD.otval, '') AND truck_id = OLD.truck_id;
+                DELETE FROM daily_agg
+                WHERE day = OLD.day AND excavator = OLD.excavator
+                  AND otval = COALESCE(OLD.otval, '') AND truck_id = OLD.truck_id
+                  AND trips <= 0;
+            END;
+
+            -- UPDATE = eski qatorni ayirish + yangisini qo‘shish
+            CREATE TRIGGER IF NOT EXISTS trg_records_agg_update AFTER UPDATE ON records
+            BEGIN
+                UPDATE daily_agg SET trips = trips - 1, obem = obem - OLD.volume
+                WHERE day = OLD.day AND excavator = OLD.excavator
+                  AND otval = COALESCE(OLD.otval, '') AND truck_id = OLD.truck_id;
+                DELETE FROM daily_agg
+                WHERE day = OLD.day AND excavator = OLD.excavator
+                  AND otval = COALESCE(OLD.otval, '') AND truck_id = OLD.truck_id
+                  AND trips <= 0;
+                INSERT INTO daily_agg (day, excavator, otval, truck_id, trips, obem)
+                VALUES (NEW.day, NEW.excavator, COALESCE(NEW.otval, ''), NEW.truck_id, 1, NEW.volume)
+                ON CONFLICT(day, excavator, otval, truck_id)
+                DO UPDATE SET trips = trips + 1, obem = obem + excluded.obem;
+            END;
+
+            -- Otvallar (nom + km)
+            CREATE TABLE IF NOT EXISTS otvals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                length REAL
+            );
+
+            -- Zayavkalar
+            CREATE TABLE IF NOT EXISTS requests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                day TEXT NOT NULL,
+                excavator TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+            -- Zayavkalar kun (+ ekskavator) bo‘yicha, ts tartibida o‘qiladi
+            CREATE INDEX IF NOT EXISTS idx_requests_day_exc_ts ON requests(day, excavator, ts);
+
+            -- Ж/Р – lokomotiv bo‘yicha объём (UTT ga qo‘shilmaydi)
+            CREATE TABLE IF NOT EXISTS jr_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                day TEXT NOT NULL,
+                loco TEXT NOT NULL,
+                volume REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jr_records_day_ts ON jr_records(day, ts);
+            """
+        )
 
-    conn.commit()
-    conn.close()
+    # Birinchi marta – daily_agg ni triggerlardan oldingi hodkalardan to‘ldiramiz
+    with get_write_lock(), conn:
+        if conn.execute("SELECT 1 FROM daily_agg LIMIT 1;").fetchone() is None:
+            conn.execute(
+                """
+                INSERT INTO daily_agg (day, excavator, otval, truck_id, trips, obem)
+                SELECT day, excavator, COALESCE(otval, ''), truck_id, COUNT(*), SUM(volume)
+                FROM records
+                GROUP BY day, excavator, COALESCE(otval, ''), truck_id;
+                """
+            )
 
     ensure_default_otvals()
 
 
 def ensure_default_otvals():
-    """Standart otvallarni borligini tekshirib, yo‘q bo‘lsa qo‘shadi."""
+    """Otvallar jadvali bo‘sh bo‘lsa, standart otvallarni bitta executemany bilan qo‘shadi."""
     default_otvals = [
         "Перегруз отвал",
         "2Ё ближний отвал",
@@ -106,34 +202,62 @@ def ensure_default_otvals():
         "МОФ-3",
     ]
     conn = get_connection()
-    cur = conn.cursor()
-    for name in default_otvals:
-        cur.execute(
-            "INSERT OR IGNORE INTO otvals (name, length) VALUES (?, NULL);",
-            (name,)
+    # Jadval bo‘sh bo‘lmasa – faqat o‘qish, yozish qulfi olinmaydi
+    if conn.execute("SELECT 1 FROM otvals LIMIT 1;").fetchone() is not None:
+        return
+    with get_write_lock(), conn:
+        # Hammasi bitta IMMEDIATE tranzaksiyada – bitta fsync;
+        # ikki jarayon bir vaqtda to‘ldirsa ON CONFLICT takrorni o‘tkazib yuboradi
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.executemany(
+            """
+            INSERT INTO otvals (name, length)
+            VALUES (?, ?)
+            ON CONFLICT(name) DO NOTHING;
+            """,
+            [(name, None) for name in default_otvals]
         )
-    conn.commit()
-    conn.close()
 
 
 # =======================
 #  BelAZ logikasi
 # =======================
 
+TRUCK_UNKNOWN = ("unknown", 0.0)
+
+# truck_id -> (klass, base_volume); diapazondan tashqari raqamlar – TRUCK_UNKNOWN
+TRUCK_TABLE = [TRUCK_UNKNOWN] * 206
+TRUCK_TABLE[0:100] = [("130т", 42.0)] * 100
+TRUCK_TABLE[100:141] = [("220т", 75.0)] * 41
+TRUCK_TABLE[200:206] = [("240т", 80.0)] * 6
+
+
 def get_volume_by_truck_id(truck_id: int):
     """
     0–99    -> 42 м³ (130т)
     100–140 -> 75 м³ (220т)
     200–205 -> 80 м³ (240т)
     """
-    if 0 <= truck_id <= 99:
-        return "130т", 42.0
-    elif 100 <= truck_id <= 140:
-        return "220т", 75.0
-    elif 200 <= truck_id <= 205:
-        return "240т", 80.0
-    else:
-        return "unknown", 0.0
+    if 0 <= truck_id < len(TRUCK_TABLE):
+        return TRUCK_TABLE[truck_id]
+    return TRUCK_UNKNOWN
+
+
+def parse_truck_id(belaz_str: str):
+    """
+    Kiritilgan БелАЗ raqamini tekshiradi: faqat ASCII raqamlar, keyin bitta int().
+    (truck_id, None) yoki (None, xato matni) qaytaradi; diapazondan
+    tashqari raqamlar DB ga murojaat qilmasdan rad etiladi.
+    """
+    if not belaz_str:
+        return None, "Введите номер БелАЗа."
+    # int() "1_0", "+5", "٥" ni ham qabul qiladi – xato boshqa БелАЗ ga yozilmasin
+    if not (belaz_str.isascii() and belaz_str.isdigit()):
+        return None, "Номер БелАЗа должен быть числом."
+    truck_id = int(belaz_str)
+    if not 0 <= truck_id < len(TRUCK_TABLE):
+        return None, "❌ Объём для этого БелАЗа не определён (номер вне диапазона)."
+    return truck_id, None
 
 
 # =======================
@@ -141,52 +265,64 @@ def get_volume_by_truck_id(truck_id: int):
 # =======================
 
 def insert_record(excavator: str, otval: str, truck_id: int, is_half: bool):
-    conn = get_connection()
-    cur = conn.cursor()
+    """Hodka yozadi (daily_agg ni records triggeri shu tranzaksiyada yangilaydi)."""
+    if excavator not in EXCAVATOR_SET:
+        return None, "Неизвестный экскаватор."
 
     truck_class, base_volume = get_volume_by_truck_id(truck_id)
     if base_volume == 0.0:
-        conn.close()
         return None, "Объём для этого БелАЗа не определён (номер вне диапазона)."
 
     factor = 0.5 if is_half else 1.0
     volume = base_volume * factor
 
-    now = get_now_tashkent()
-    ts = now.strftime("%Y-%m-%d %H:%M:%S")
-    day = now.strftime("%Y-%m-%d")
-
-    cur.execute(
-        """
-        INSERT INTO records
-        (ts, day, excavator, otval, truck_id, truck_class, base_volume, factor, volume)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (ts, day, excavator, otval, truck_id, truck_class, base_volume, factor, volume)
-    )
+    ts, day = get_ts_day()
 
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with get_write_lock(), conn:
+        # volume = base_volume * factor – SQLite o‘zi hisoblaydi (?7 * ?8)
+        conn.execute(
+            """
+            INSERT INTO records
+            (ts, day, excavator, otval, truck_id, truck_class, base_volume, factor, volume)
+            VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?7 * ?8)
+            """,
+            (ts, day, excavator, otval, truck_id, truck_class, base_volume, factor)
+        )
+    # Faqat hodkalarga bog‘liq keshlar tozalanadi (logo va h.k. qoladi)
+    get_daily_records.clear()
+    get_daily_aggregated_all.clear()
+    get_otval_summary.clear()
+    get_otval_totals.clear()
+    build_pogruzki_excel.clear()
+    build_pogruzki_csv.clear()
     return volume, None
 
 
-def get_daily_records(day_str: str, excavator: str) -> pd.DataFrame:
-    """Bitta ekskavator bo‘yicha kunlik hodkalar (detal)."""
+@st.cache_data(ttl=60, show_spinner=False)
+def get_daily_records(day_str: str, excavator: str) -> list:
+    """
+    Bitta ekskavator bo‘yicha kunlik hodkalar (detal) – list of dict, pandas siz.
+    Ustunlar ekrandagi tartibda tanlanadi, qayta tartiblash kerak emas.
+    """
     conn = get_connection()
     query = """
-        SELECT id, ts, day, excavator, otval, truck_id, truck_class,
-               base_volume, factor, volume
+        SELECT day, ts, excavator, otval, truck_id, truck_class,
+               base_volume, factor, volume,
+               ROW_NUMBER() OVER (ORDER BY ts, id) AS xodka
         FROM records
         WHERE day = ? AND excavator = ?
-        ORDER BY ts;
+        ORDER BY ts, id;
     """
-    df = pd.read_sql_query(query, conn, params=(day_str, excavator))
-    conn.close()
-    return df
+    rows = conn.execute(query, (day_str, excavator)).fetchall()
+    return [dict(row) for row in rows]
 
 
-def get_daily_details_all(day_str: str) -> pd.DataFrame:
-    """Kun bo‘yicha barcha hodkalar (barcha ekskavatorlar, barcha otvallar)."""
+def get_daily_details_all(day_str: str):
+    """
+    Kun bo‘yicha barcha hodkalar (barcha ekskavatorlar, barcha otvallar) –
+    EXCEL_CHUNKSIZE qatorli DataFrame bo‘laklari iteratori (butun kun xotirada turmaydi).
+    """
     conn = get_connection()
     query = """
         SELECT ts, day, excavator, otval, truck_id, truck_class,
@@ -195,75 +331,80 @@ def get_daily_details_all(day_str: str) -> pd.DataFrame:
         WHERE day = ?
         ORDER BY ts;
     """
-    df = pd.read_sql_query(query, conn, params=(day_str,))
-    conn.close()
-    return df
+    return pd.read_sql_query(query, conn, params=(day_str,), chunksize=EXCEL_CHUNKSIZE)
+
 
+AGG_COLUMNS = ["day", "excavator", "otval", "truck_id", "trips", "obem",
+               "total_trips", "total_obem"]
 
+
+@st.cache_data(ttl=60, show_spinner=False)
 def get_daily_aggregated_all(day_str: str) -> pd.DataFrame:
-    """Kun bo‘yicha agregat: day / exc / otval / truck_id."""
+    """Kun bo‘yicha agregat: day / exc / otval / truck_id (daily_agg jadvalidan) + jami."""
     conn = get_connection()
+    # total_* – butun kun bo‘yicha jami (har qatorda bir xil), alohida yig‘ish shart emas
     query = """
-        SELECT
-            day,
-            excavator,
-            otval,
-            truck_id,
-            COUNT(*) AS trips,
-            SUM(volume) AS obem
-        FROM records
+        SELECT day, excavator, otval, truck_id, trips, obem,
+               SUM(trips) OVER () AS total_trips,
+               SUM(obem) OVER () AS total_obem
+        FROM daily_agg
         WHERE day = ?
-        GROUP BY day, excavator, otval, truck_id
         ORDER BY excavator, otval, truck_id;
     """
-    df = pd.read_sql_query(query, conn, params=(day_str,))
-    conn.close()
-    return df
+    rows = conn.execute(query, (day_str,)).fetchall()
+    return pd.DataFrame.from_records(rows, columns=AGG_COLUMNS)
 
 
 # =======================
 #  DB – otvals
 # =======================
 
-def get_otvals_table() -> pd.DataFrame:
+@st.cache_data(ttl=60, show_spinner=False)
+def get_otvals_table() -> list:
+    """Otvallar ro‘yxati [{"id", "name", "length"}, ...] – kichik jadval, pandas siz."""
     conn = get_connection()
-    df = pd.read_sql_query("SELECT id, name, length FROM otvals ORDER BY id;", conn)
-    conn.close()
-    return df
+    rows = conn.execute("SELECT id, name, length FROM otvals ORDER BY id;").fetchall()
+    return [dict(row) for row in rows]
 
 
-def get_otval_length(name: str):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT length FROM otvals WHERE name = ?;", (name,))
-    row = cur.fetchone()
-    conn.close()
-    if row is None:
-        return None
-    return row[0]
+def build_otval_labels(otvals: list) -> dict:
+    """
+    Otval nomi -> ko‘rinadigan yorliq ("nom (km)" yoki faqat nom).
+    Qo‘lda turgan otvals ro‘yxatidan quriladi – nomlar va yorliqlar doim bir xil holatdan.
+    """
+    return {
+        o["name"]: o["name"] if o["length"] is None else f"{o['name']} ({o['length']} км)"
+        for o in otvals
+    }
 
 
 def upsert_otval(name: str, length):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO otvals (name, length)
-        VALUES (?, ?)
-        ON CONFLICT(name) DO UPDATE SET length = excluded.length;
-        """,
-        (name, length)
-    )
-    conn.commit()
-    conn.close()
+    with get_write_lock(), conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO otvals (name, length)
+            VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET length = excluded.length;
+            """,
+            (name, length)
+        )
+    # Otval nomi/uzunligi ko‘rinadigan keshlar
+    get_otvals_table.clear()
+    get_otval_summary.clear()
+    build_pogruzki_excel.clear()
 
 
 def delete_otval(name: str):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM otvals WHERE name = ?;", (name,))
-    conn.commit()
-    conn.close()
+    with get_write_lock(), conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM otvals WHERE name = ?;", (name,))
+    # Otval nomi/uzunligi ko‘rinadigan keshlar
+    get_otvals_table.clear()
+    get_otval_summary.clear()
+    build_pogruzki_excel.clear()
 
 
 # =======================
@@ -273,20 +414,23 @@ def delete_otval(name: str):
 def insert_request(excavator: str, text: str):
     conn = get_connection()
     cur = conn.cursor()
-    now = get_now_tashkent()
-    ts = now.strftime("%Y-%m-%d %H:%M:%S")
-    day = now.strftime("%Y-%m-%d")
-    cur.execute(
-        """
-        INSERT INTO requests (ts, day, excavator, text)
-        VALUES (?, ?, ?, ?)
-        """,
-        (ts, day, excavator, text)
-    )
-    conn.commit()
-    conn.close()
+    ts, day = get_ts_day()
+    with get_write_lock(), conn:
+        cur.execute(
+            """
+            INSERT INTO requests (ts, day, excavator, text)
+            VALUES (?, ?, ?, ?)
+            """,
+            (ts, day, excavator, text)
+        )
+    get_requests_for_excavator.clear()
+    get_requests_by_day.clear()
+    build_zayavki_excel.clear()
 
 
+# Zayavka matnlari uzun – ustunlar Arrow (pyarrow, streamlit bilan keladi) da:
+# st.dataframe ga object -> utf8 o‘girishsiz uzatiladi
+@st.cache_data(ttl=60, show_spinner=False)
 def get_requests_for_excavator(day_str: str, excavator: str) -> pd.DataFrame:
     conn = get_connection()
     query = """
@@ -295,11 +439,11 @@ def get_requests_for_excavator(day_str: str, excavator: str) -> pd.DataFrame:
         WHERE day = ? AND excavator = ?
         ORDER BY ts;
     """
-    df = pd.read_sql_query(query, conn, params=(day_str, excavator))
-    conn.close()
+    df = pd.read_sql_query(query, conn, params=(day_str, excavator), dtype_backend="pyarrow")
     return df
 
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_requests_by_day(day_str: str) -> pd.DataFrame:
     conn = get_connection()
     query = """
@@ -308,8 +452,7 @@ def get_requests_by_day(day_str: str) -> pd.DataFrame:
         WHERE day = ?
         ORDER BY excavator, ts;
     """
-    df = pd.read_sql_query(query, conn, params=(day_str,))
-    conn.close()
+    df = pd.read_sql_query(query, conn, params=(day_str,), dtype_backend="pyarrow")
     return df
 
 
@@ -320,20 +463,20 @@ def get_requests_by_day(day_str: str) -> pd.DataFrame:
 def insert_jr(loco: str, volume: float):
     conn = get_connection()
     cur = conn.cursor()
-    now = get_now_tashkent()
-    ts = now.strftime("%Y-%m-%d %H:%M:%S")
-    day = now.strftime("%Y-%m-%d")
-    cur.execute(
-        """
-        INSERT INTO jr_records (ts, day, loco, volume)
-        VALUES (?, ?, ?, ?)
-        """,
-        (ts, day, loco, volume)
-    )
-    conn.commit()
-    conn.close()
+    ts, day = get_ts_day()
+    with get_write_lock(), conn:
+        cur.execute(
+            """
+            INSERT INTO jr_records (ts, day, loco, volume)
+            VALUES (?, ?, ?, ?)
+            """,
+            (ts, day, loco, volume)
+        )
+    get_jr_by_day.clear()
+    build_pogruzki_excel.clear()
 
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_jr_by_day(day_str: str) -> pd.DataFrame:
     conn = get_connection()
     query = """
@@ -343,7 +486,6 @@ def get_jr_by_day(day_str: str) -> pd.DataFrame:
         ORDER BY ts;
     """
     df = pd.read_sql_query(query, conn, params=(day_str,))
-    conn.close()
     return df
 
 
@@ -351,67 +493,571 @@ def get_jr_by_day(day_str: str) -> pd.DataFrame:
 #  Otval summary (records)
 # =======================
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_otval_summary(day_str: str) -> pd.DataFrame:
     """
     Kun bo‘yicha otval + excavator kesimi:
     faqat records jadvalidan (BelAZ + Хоз. работа otvallari).
+    Yig‘ish va otval uzunligini qo‘shish bitta SQL da.
     """
     conn = get_connection()
-    df_rec = pd.read_sql_query(
-        "SELECT day, otval, excavator, volume FROM records WHERE day = ?;",
-        conn,
-        params=(day_str,)
-    )
-    df_otvals = pd.read_sql_query(
-        "SELECT name, length FROM otvals;",
-        conn
-    )
-    conn.close()
+    query = """
+        SELECT a.day, a.otval, a.excavator, a.obem, o.length
+        FROM (
+            SELECT day, otval, excavator, SUM(volume) AS obem
+            FROM records
+            WHERE day = ?
+            GROUP BY day, otval, excavator
+        ) AS a
+        LEFT JOIN otvals AS o ON o.name = a.otval
+        ORDER BY a.otval, a.excavator;
+    """
+    df = pd.read_sql_query(query, conn, params=(day_str,))
+    return df
 
-    if df_rec.empty:
-        return pd.DataFrame(columns=["day", "otval", "excavator", "obem", "length"])
 
-    df_all = (
-        df_rec
-        .groupby(["day", "otval", "excavator"], as_index=False)["volume"]
-        .sum()
-    )
-    df_all = df_all.rename(columns={"volume": "obem"})
+@st.cache_data(ttl=60, show_spinner=False)
+def get_otval_totals(day_str: str) -> pd.DataFrame:
+    """Kun bo‘yicha har bir otval uchun jami объём (SQL da yig‘iladi)."""
+    conn = get_connection()
+    query = """
+        SELECT otval, SUM(volume) AS obem
+        FROM records
+        WHERE day = ?
+        GROUP BY otval
+        ORDER BY otval;
+    """
+    df = pd.read_sql_query(query, conn, params=(day_str,))
+    return df
 
-    if not df_otvals.empty:
-        df_all = df_all.merge(
-            df_otvals.rename(columns={"name": "otval"}),
-            how="left",
-            on="otval"
-        )
-        df_all = df_all.rename(columns={"length": "length"})
+
+# =======================
+#  Excel eksport
+# =======================
+
+# Excel uchun hodkalar shuncha qatordan o‘qiladi
+EXCEL_CHUNKSIZE = 5000
+
+# Ekran va Excel uchun umumiy ustun nomlari (tartib – dict tartibi)
+REQUEST_VIEW_COLUMNS = {
+    "day": "Дата",
+    "ts": "Время",
+    "excavator": "Экскаватор",
+    "text": "Заявка",
+}
+JR_VIEW_COLUMNS = {
+    "day": "Дата",
+    "ts": "Время",
+    "loco": "№ локомотива",
+    "volume": "Объём, м³",
+}
+JR_EXCEL_COLUMNS = ["Ж/Р", "№ локомотива", "Объём, м³"]
+
+
+def _write_df(worksheet, df: pd.DataFrame, startrow: int = 0):
+    """DataFrame ni sarlavha + qatorlar ko'rinishida ketma-ket yozadi (NaN -> bo'sh)."""
+    worksheet.write_row(startrow, 0, list(df.columns))
+    for i, row in enumerate(df.itertuples(index=False), start=startrow + 1):
+        worksheet.write_row(i, 0, [None if v != v else v for v in row])
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def build_pogruzki_excel(day_str: str):
+    """Kunlik pogruzki Excel fayli (Ходки + Отвалы/Ж/Р). Ma'lumot bo'lmasa None."""
+    # Hodkalar bo‘laklab o‘qiladi – butun kun xotirada bitta DataFrame bo‘lib turmaydi
+    chunks = get_daily_details_all(day_str)
+    first_chunk = next(chunks, None)
+    if first_chunk is None or first_chunk.empty:
+        return None
+
+    # Отвал nom + (km) uchun: nom -> yorliq
+    otval_labels = build_otval_labels(get_otvals_table())
+
+    # constant_memory: qatorlar diskka oqim bilan yoziladi, butun list xotirada turmaydi
+    output_pog = BytesIO()
+    workbook = xlsxwriter.Workbook(output_pog, {"constant_memory": True})
+
+    # Sheet 1 – Ходки (sana + vaqt bitta ustunda, OTVAL+KM)
+    ws_hodki = workbook.add_worksheet("Ходки")
+    ws_hodki.write_row(0, 0, [
+        "Дата/Время", "Экскаватор", "Отвал", "Номер БелАЗа",
+        "Класс БелАЗа", "Базовый объём, м³", "Коэффициент", "Объём, м³"
+    ])
+    row_idx = 1
+    total_obem_det = 0.0
+    for chunk in chain([first_chunk], chunks):
+        for rec in chunk.itertuples(index=False):
+            ws_hodki.write_row(row_idx, 0, [
+                rec.ts, rec.excavator, otval_labels.get(rec.otval, rec.otval), rec.truck_id,
+                rec.truck_class, rec.base_volume, rec.factor, rec.volume
+            ])
+            total_obem_det += rec.volume
+            row_idx += 1
+
+    # Yakuniy qator – umumiy (УТТ)
+    ws_hodki.write_row(row_idx, 0, ["", "УТТ", "", "", "", "", "", total_obem_det])
+
+    # --- Отвалы sheet: records (shuningdek хоз. работа otvallari) ---
+    otval_df_view = get_otval_totals(day_str).rename(columns={
+        "otval": "Отвал",
+        "obem": "Объём, м³",
+    })
+
+    # --- Ж/Р jadvali (alohida, UTT ga qo‘shilmaydi) ---
+    df_jr_day = get_jr_by_day(day_str)
+    if df_jr_day.empty:
+        jr_view = pd.DataFrame(columns=JR_EXCEL_COLUMNS)
     else:
-        df_all["length"] = None
+        jr_view = df_jr_day.rename(columns=JR_VIEW_COLUMNS)
+        jr_view["Ж/Р"] = "Ж/Р"
+        jr_view = jr_view[JR_EXCEL_COLUMNS]
+
+    # Sheet 2 – Отвалы (+ УТТ qatori, + Ж/Р pastda)
+    ws_otval = workbook.add_worksheet("Отвалы")
+    _write_df(ws_otval, otval_df_view)
+    otval_rows = len(otval_df_view)
+    if otval_rows:
+        otval_rows += 1
+        ws_otval.write_row(otval_rows, 0, ["УТТ", float(otval_df_view["Объём, м³"].to_numpy().sum())])
+
+    if not jr_view.empty:
+        startrow = otval_rows + 3
+        _write_df(ws_otval, jr_view, startrow=startrow)
+
+    workbook.close()
+    return output_pog.getvalue()
+
+
+# CSV uchun ustun nomlari (Ходки sheet bilan bir xil tartib)
+HODKI_CSV_COLUMNS = {
+    "ts": "Дата/Время",
+    "excavator": "Экскаватор",
+    "otval": "Отвал",
+    "truck_id": "Номер БелАЗа",
+    "truck_class": "Класс БелАЗа",
+    "base_volume": "Базовый объём, м³",
+    "factor": "Коэффициент",
+    "volume": "Объём, м³",
+}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def build_pogruzki_csv(day_str: str):
+    """Kunlik hodkalar CSV (katta kunlar uchun tez yo‘l – xlsx siz). Ma'lumot bo'lmasa None."""
+    output_csv = StringIO()
+    header = True
+    for chunk in get_daily_details_all(day_str):
+        if chunk.empty:
+            continue
+        chunk = chunk.rename(columns=HODKI_CSV_COLUMNS)[list(HODKI_CSV_COLUMNS.values())]
+        chunk.to_csv(output_csv, index=False, header=header)
+        header = False
+    if header:
+        return None
+    # utf-8-sig – Excel kirillni to‘g‘ri ochishi uchun (BOM)
+    return output_csv.getvalue().encode("utf-8-sig")
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def build_zayavki_excel(day_str: str):
+    """Kunlik zayavkalar Excel fayli. Zayavka bo'lmasa None."""
+    df_req_all = get_requests_by_day(day_str)
+    if df_req_all.empty:
+        return None
 
-    return df_all
+    df_req_all_view = df_req_all.rename(columns=REQUEST_VIEW_COLUMNS)[list(REQUEST_VIEW_COLUMNS.values())]
+
+    output_zay = BytesIO()
+    workbook = xlsxwriter.Workbook(output_zay, {"constant_memory": True})
+    _write_df(workbook.add_worksheet("Заявки"), df_req_all_view)
+    workbook.close()
+
+    return output_zay.getvalue()
 
 
 # =======================
 #  UI config
 # =======================
 
-EXCAVATORS = [
+@st.cache_data(ttl=86400, show_spinner=False)
+def get_logo():
+    """Logotip baytlari (lokal fayldan, bir kunga keshlanadi); fayl bo‘lmasa – URL."""
+    if os.path.exists(LOGO_FILE):
+        with open(LOGO_FILE, "rb") as f:
+            return f.read()
+    return LOGO_URL
+
+
+EXCAVATORS = (
     "1Y", "2Y",
     "13Y",
     "18Y", "19Y", "20Y", "21Y", "22Y", "23Y", "24Y", "25Y", "26Y", "27Y",
     "28Y", "29Y", "30Y", "31Y", "32Y"
-]  # Y4 olib tashlangan
+)  # Y4 olib tashlangan
+EXCAVATOR_SET = frozenset(EXCAVATORS)
+
+
+# Umumiy svod jadvali: ustun nomlari; ko‘rinadiganlari – shular (total_* yashiriladi)
+AGG_RENAME = {
+    "day": "Дата",
+    "excavator": "Экскаватор",
+    "otval": "Отвал",
+    "truck_id": "Номер БелАЗа",
+    "trips": "Количество ходок",
+    "obem": "Объём, м³",
+}
+AGG_VIEW_COLUMNS = list(AGG_RENAME.values())
+
+# Otval svodi (admin) ustun nomlari
+OTVAL_SUMMARY_RENAME = {
+    "day": "Дата",
+    "otval": "Отвал",
+    "excavator": "Экскаватор",
+    "obem": "Объём, м³",
+    "length": "Длина отвала, км",
+}
+
+# Otvallar jadvali (list of dict) uchun ustun sarlavhalari
+OTVALS_COLUMN_CONFIG = {
+    "id": "ID",
+    "name": "Отвал",
+    "length": "Длина, км",
+}
+
+# "Сегодняшние ходки" jadvali (list of dict) uchun ustun sarlavhalari
+HODKA_COLUMN_CONFIG = {
+    "truck_id": "Номер БелАЗа",
+    "volume": "Объём, м³",
+    "day": "Дата",
+    "ts": "Время",
+    "excavator": "Экскаватор",
+    "otval": "Отвал",
+    "truck_class": "Класс БелАЗа",
+    "base_volume": "Базовый объём, м³",
+    "factor": "Коэффициент",
+    "xodka": "Ходка №",
+}
+
+
+# Navigatsiya holati URL da ham saqlanadi: sahifa yangilansa / havola ulashilsa joyida qoladi
+NAV_QUERY_PARAMS = {
+    "selected_excavator": "exc",
+    "mode": "mode",
+    "selected_otval": "otval",
+}
+MODES = ("pogruzki", "zayavki")
 
 
 def init_session_state():
+    # Yangi sessiya – holat query params dan tiklanadi (noma'lum qiymatlar tashlanadi)
     if "selected_excavator" not in st.session_state:
-        st.session_state["selected_excavator"] = None
+        exc = st.query_params.get("exc")
+        st.session_state["selected_excavator"] = exc if exc in EXCAVATOR_SET else None
     if "selected_otval" not in st.session_state:
-        st.session_state["selected_otval"] = None
+        # otval nomi main() da otvallar ro‘yxati bilan tekshiriladi
+        st.session_state["selected_otval"] = st.query_params.get("otval")
     if "is_admin" not in st.session_state:
         st.session_state["is_admin"] = False
     if "mode" not in st.session_state:
-        st.session_state["mode"] = None  # "pogruzki" yoki "zayavki"
+        mode = st.query_params.get("mode")
+        st.session_state["mode"] = mode if mode in MODES else None  # "pogruzki" yoki "zayavki"
+
+
+def set_state(**values):
+    """Tugma on_click uchun: holat rerun dan oldin o‘zgaradi (qo‘shimcha st.rerun() shart emas)."""
+    st.session_state.update(values)
+    for key, value in values.items():
+        param = NAV_QUERY_PARAMS.get(key)
+        if param is None:
+            continue
+        if value is None:
+            st.query_params.pop(param, None)
+        else:
+            st.query_params[param] = value
+
+
+# Katta jadvallar brauzerga sahifalab yuboriladi
+PAGE_SIZE = 100
+
+
+def paginate(rows, key: str):
+    """rows (list yoki DataFrame) dan joriy sahifani qaytaradi; ko‘p bo‘lsa – sahifa tanlash / hammasi."""
+    total = len(rows)
+    if total <= PAGE_SIZE:
+        return rows
+    if st.toggle(f"Показать все ({total})", key=f"{key}_all"):
+        return rows
+    pages = (total - 1) // PAGE_SIZE + 1
+    page = st.number_input(f"Страница (из {pages})", min_value=1, max_value=pages, value=1, key=key)
+    start = (page - 1) * PAGE_SIZE
+    if isinstance(rows, pd.DataFrame):
+        return rows.iloc[start:start + PAGE_SIZE]
+    return rows[start:start + PAGE_SIZE]
+
+
+# =======================
+#  TAB 1: Vvod (mashinist)
+# =======================
+
+def render_input_tab(selected_excavator, selected_otval, otval_label, is_jr):
+    # Fragment emas: saqlash butun sahifani qayta ishlatadi – svod tab ham yangilanadi.
+    # Kun – get_ts_day() yozadigan Toshkent kuni (server vaqti emas)
+    today_str = get_now_tashkent().date().isoformat()
+
+    # === 1) Ж/Р rejimi ===
+    if is_jr:
+        st.subheader("Ж/Р – учёт по локомотивам")
+
+        with st.form("jr_form_mach", clear_on_submit=True):
+            col_j1, col_j2 = st.columns(2)
+            with col_j1:
+                loco = st.text_input("Номер локомотива", placeholder="Например: 001, 23А и т.п.")
+            with col_j2:
+                vol_str = st.text_input("Объём, м³", placeholder="Например: 120.5")
+
+            jr_submit = st.form_submit_button("💾 Сохранить Ж/Р")
+
+        if jr_submit:
+            loco_clean = loco.strip()
+            vol_clean = vol_str.strip()
+            if not loco_clean or not vol_clean:
+                st.error("Укажите и номер локомотива, и объём.")
+            else:
+                try:
+                    vol_val = float(vol_clean.replace(",", "."))
+                except ValueError:
+                    st.error("Объём должен быть числом.")
+                else:
+                    insert_jr(loco_clean, vol_val)
+                    st.success("Ж/Р запись сохранена.")
+
+        st.markdown(f"#### Ж/Р за {today_str}")
+        df_jr_today = get_jr_by_day(today_str)
+        if df_jr_today.empty:
+            st.info("Ж/Р записей за сегодня нет.")
+        else:
+            df_jr_view = df_jr_today.rename(columns=JR_VIEW_COLUMNS)[list(JR_VIEW_COLUMNS.values())]
+            st.dataframe(df_jr_view, use_container_width=True)
+
+    # === 2) Oddiy otval – BelAZ hodkalar ===
+    else:
+        st.subheader(f"Новая ходка — {selected_excavator}, {otval_label}")
+
+        with st.form("hodka_form", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                belaz_input = st.text_input(
+                    "Номер БелАЗа",
+                    value="",
+                    placeholder="Например: 201"
+                )
+
+            with col2:
+                is_half = st.checkbox("Полупустая (0.5 загрузки)")
+
+            submitted = st.form_submit_button("💾 Сохранить ходку")
+
+        if submitted:
+            truck_id, error = parse_truck_id(belaz_input.strip())
+
+            if error:
+                st.error(error)
+            else:
+                volume, error = insert_record(selected_excavator, selected_otval, truck_id, is_half)
+
+                if error:
+                    st.error("❌ " + error)
+                else:
+                    st.success(
+                        f"Ходка сохранена: экскаватор {selected_excavator} | отвал: {otval_label} | "
+                        f"БелАЗ №{truck_id} | "
+                        f"{'0.5 загрузки' if is_half else 'полная загрузка'} | "
+                        f"{volume:.2f} м³"
+                    )
+
+        # Mashinist uchun — bugungi hodkalar (faqat BelAZ)
+        st.markdown(f"### Сегодняшние ходки ({today_str}) по экскаватору {selected_excavator}")
+
+        rows_ex_today = get_daily_records(today_str, selected_excavator)
+
+        if not rows_ex_today:
+            st.info("Сегодня пока нет сохранённых ходок для этого экскаватора.")
+        else:
+            st.dataframe(
+                paginate(rows_ex_today, key="hodka_page"),
+                use_container_width=True,
+                hide_index=True,
+                column_config=HODKA_COLUMN_CONFIG
+            )
+
+
+# =======================
+#  TAB 2: Admin / umumiy svod
+# =======================
+
+@st.fragment
+def render_summary_tab(is_admin, otvals, otval_names):
+    st.subheader("Общий свод по всем экскаваторам")
+
+    # Fragment qayta ishlaganda ham joriy kun (argument sifatida eskirib qolmaydi)
+    today = get_now_tashkent().date()
+    selected_day = st.date_input("Дата свода", value=today, key="master_date")
+    day_str = selected_day.isoformat()
+
+    st.markdown(f"### Дата: **{day_str}**")
+
+    df_all_agg = get_daily_aggregated_all(day_str)
+
+    if df_all_agg.empty:
+        st.info("Нет данных за выбранную дату по всем экскаваторам.")
+    else:
+        df_all_view = df_all_agg.rename(columns=AGG_RENAME)
+
+        total_trips_all = int(df_all_agg["total_trips"].iat[0])
+        total_obem_all = float(df_all_agg["total_obem"].iat[0])
+
+        st.markdown("#### Агрегированный свод (день / экскаватор / отвал / БелАЗ)")
+        st.dataframe(
+            paginate(df_all_view, key="agg_page"),
+            use_container_width=True,
+            hide_index=True,
+            column_order=AGG_VIEW_COLUMNS
+        )
+
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.metric("Общее количество ходок (все экскаваторы)", total_trips_all)
+        with col_b:
+            st.metric("Общий объём (м³) по всем экскаваторам", f"{total_obem_all:.2f}")
+
+    st.divider()
+    st.markdown("### 🔐 Admin panel")
+
+    if not is_admin:
+        st.info("Для доступа к admin panel введите верный admin code сверху.")
+        return
+
+    st.success("Админ режим активен.")
+
+    # --- Otvallar bo‘yicha svod ekranda (records) ---
+    st.markdown("#### Свод по отвалам (отвал + экскаватор, объём) для экрана")
+    df_otval_full = get_otval_summary(day_str)
+
+    if df_otval_full.empty:
+        st.info("Нет данных по отвалам за выбранную дату.")
+    else:
+        df_otval_full_view = df_otval_full.rename(columns=OTVAL_SUMMARY_RENAME)
+        st.dataframe(df_otval_full_view, use_container_width=True, hide_index=True)
+
+    st.divider()
+    st.markdown("#### 📥 Экспорт отчётов (погрузки / заявки)")
+
+    # --- Pogruzki Excel (BelAZ hodkalar, sana+vaqt bitta ustunda, OTVAL+KM) ---
+    # Fayl faqat tugma bosilganda yasaladi (data=callable), bosish rerun qilmaydi
+    if df_all_agg.empty:
+        st.info("Нет данных по погрузкам за выбранную дату (для Excel).")
+    else:
+        st.download_button(
+            label="⬇️ Скачать Excel погрузок",
+            data=lambda: build_pogruzki_excel(day_str),
+            file_name=f"belaz_pogruzki_{day_str}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="download_pogruzki",
+            on_click="ignore"
+        )
+        st.download_button(
+            label="⬇️ Скачать CSV погрузок",
+            data=lambda: build_pogruzki_csv(day_str),
+            file_name=f"belaz_pogruzki_{day_str}.csv",
+            mime="text/csv",
+            key="download_pogruzki_csv",
+            on_click="ignore"
+        )
+
+    # --- Zayavki Excel ---
+    if get_requests_by_day(day_str).empty:
+        st.info("Нет заявок за выбранную дату (для Excel).")
+    else:
+        st.download_button(
+            label="⬇️ Скачать Excel заявок",
+            data=lambda: build_zayavki_excel(day_str),
+            file_name=f"belaz_zayavki_{day_str}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="download_zayavki",
+            on_click="ignore"
+        )
+
+    st.divider()
+
+    # --- OTVAL MANAGEMENT (faqat admin) ---
+    st.markdown("#### Управление отвалами")
+
+    # otvals – shu rerun boshida o‘qilgan jadval, qayta so‘ramaymiz
+    st.dataframe(otvals, use_container_width=True, column_config=OTVALS_COLUMN_CONFIG)
+
+    st.markdown("**Добавить / обновить отвал (Admin)**")
+
+    special_new = "— Новый отвал —"
+    select_options = [special_new] + otval_names
+
+    sel_for_edit = st.selectbox(
+        "Выберите существующий отвал или «Новый отвал»",
+        select_options,
+        key="admin_otval_select"
+    )
+
+    new_len_input_admin = st.text_input(
+        "Длина отвала (км, можно пусто)",
+        key="new_otval_len_admin",
+        placeholder="Например: 3.2"
+    )
+
+    if sel_for_edit == special_new:
+        new_otval_name_admin = st.text_input(
+            "Название нового отвала",
+            key="new_otval_name_admin",
+            placeholder="Например: МОФ-5",
+        )
+    else:
+        new_otval_name_admin = sel_for_edit  # bor otval nomi
+
+    add_col, del_col = st.columns(2)
+
+    with add_col:
+        if st.button("💾 Сохранить (добавить/обновить) отвал", key="admin_save_otval"):
+            name = new_otval_name_admin.strip()
+            if not name:
+                st.error("Название отвала обязательно.")
+            else:
+                if new_len_input_admin.strip() == "":
+                    length_val = None
+                else:
+                    try:
+                        length_val = float(new_len_input_admin.replace(",", "."))
+                    except ValueError:
+                        st.error("Длина должна быть числом (например 3.2).")
+                        length_val = None
+
+                if new_len_input_admin.strip() == "" or length_val is not None:
+                    upsert_otval(name, length_val)
+                    st.success("Отвал сохранён (Admin).")
+                    st.rerun()
+
+    with del_col:
+        st.markdown("**Удалить отвал**")
+        if not otvals:
+            st.write("Отвалов нет.")
+        else:
+            del_name = st.selectbox(
+                "Выберите отвал для удаления",
+                otval_names,
+                key="delete_otval_select"
+            )
+            if st.button("🗑 Удалить отвал", type="secondary", key="btn_del_otval"):
+                delete_otval(del_name)
+                st.warning(f"Отвал «{del_name}» удалён. История в записях сохранена.")
+                st.rerun()
 
 
 # =======================
@@ -422,11 +1068,12 @@ def main():
     st.set_page_config(page_title='Карьер "БАРАКАЛИ"- @SJ8696', layout="wide")
     init_db()
     init_session_state()
+    today = get_now_tashkent().date()
 
     # ------------ HEADER ------------
     hcol1, hcol2 = st.columns([1.2, 3])
     with hcol1:
-        st.image(LOGO_URL, use_container_width=True)
+        st.image(get_logo(), use_container_width=True)
     with hcol2:
         st.markdown(
             """
@@ -442,16 +1089,20 @@ def main():
     admin_col1, admin_col2 = st.columns([2, 3])
     with admin_col1:
         st.caption("Режим администратора (для мастера / начальства)")
-        admin_input = st.text_input("Admin code", type="password", label_visibility="collapsed")
-    with admin_col2:
-        if st.button("🔐 Войти как админ"):
-            if admin_input == ADMIN_CODE:
-                st.session_state["is_admin"] = True
-                st.success("Админ режим активирован.")
-            else:
-                st.error("Неверный admin code.")
-        if st.button("🚪 Выйти из админ режима"):
-            st.session_state["is_admin"] = False
+        if st.session_state["is_admin"]:
+            st.button("🚪 Выйти из админ режима", on_click=set_state, kwargs={"is_admin": False})
+        else:
+            # Forma: kod yozilayotganda rerun yo‘q, faqat "Войти" bosilganda
+            with st.form("admin_form", clear_on_submit=True):
+                admin_input = st.text_input("Admin code", type="password", label_visibility="collapsed")
+                admin_submit = st.form_submit_button("🔐 Войти как админ")
+            if admin_submit:
+                if admin_input == ADMIN_CODE:
+                    st.session_state["is_admin"] = True
+                    st.rerun()
+                else:
+                    with admin_col2:
+                        st.error("Неверный admin code.")
 
     is_admin = st.session_state["is_admin"]
 
@@ -465,22 +1116,20 @@ def main():
     if selected_excavator is None:
         st.subheader("Выберите экскаватор")
 
-        cols = st.columns(3)
-        for i, exc in enumerate(EXCAVATORS):
-            col = cols[i % 3]
-            if col.button(exc, use_container_width=True):
-                st.session_state["selected_excavator"] = exc
-                st.session_state["selected_otval"] = None
-                st.session_state["mode"] = None
-                st.rerun()
+        # Har qator – 3 ta tugma (bitta st.columns qatori)
+        for start in range(0, len(EXCAVATORS), 3):
+            for col, exc in zip(st.columns(3), EXCAVATORS[start:start + 3]):
+                col.button(
+                    exc, use_container_width=True, on_click=set_state,
+                    kwargs={"selected_excavator": exc, "selected_otval": None, "mode": None}
+                )
         return
 
     st.markdown(f"### Экскаватор: **{selected_excavator}**")
-    if st.button("⏪ Сменить экскаватор"):
-        st.session_state["selected_excavator"] = None
-        st.session_state["selected_otval"] = None
-        st.session_state["mode"] = None
-        st.rerun()
+    st.button(
+        "⏪ Сменить экскаватор", on_click=set_state,
+        kwargs={"selected_excavator": None, "selected_otval": None, "mode": None}
+    )
 
     st.divider()
 
@@ -489,22 +1138,17 @@ def main():
         st.subheader("Выберите режим работы")
         mcol1, mcol2 = st.columns(2)
         with mcol1:
-            if st.button("🚚 Погрузки", use_container_width=True):
-                st.session_state["mode"] = "pogruzki"
-                st.rerun()
+            st.button("🚚 Погрузки", use_container_width=True, on_click=set_state, kwargs={"mode": "pogruzki"})
         with mcol2:
-            if st.button("📋 Заявки", use_container_width=True):
-                st.session_state["mode"] = "zayavki"
-                st.rerun()
+            st.button("📋 Заявки", use_container_width=True, on_click=set_state, kwargs={"mode": "zayavki"})
         return
 
     # ------------ ZAYAVKI MODE ------------
     if mode == "zayavki":
         st.subheader(f"Заявки по экскаватору {selected_excavator}")
 
-        today = date.today()
         selected_day = st.date_input("Дата заявок", value=today, key="zayavki_date")
-        day_str = selected_day.strftime("%Y-%m-%d")
+        day_str = selected_day.isoformat()
 
         st.markdown("#### Создать новую заявку")
         with st.form("zayavka_form", clear_on_submit=True):
@@ -529,27 +1173,25 @@ def main():
         if df_req.empty:
             st.info("Заявок за выбранную дату нет.")
         else:
-            df_req_view = df_req.copy()
-            df_req_view = df_req_view.rename(columns={
-                "day": "Дата",
-                "ts": "Время",
-                "excavator": "Экскаватор",
-                "text": "Заявка",
-            })
-            df_req_view = df_req_view[["Дата", "Время", "Экскаватор", "Заявка"]]
+            df_req_view = df_req.rename(columns=REQUEST_VIEW_COLUMNS)[list(REQUEST_VIEW_COLUMNS.values())]
             st.dataframe(df_req_view, use_container_width=True)
 
         st.markdown("---")
         st.markdown("Если нужно перейти к учёту ходок БелАЗов:")
-        if st.button("➡️ Перейти в режим погрузки"):
-            st.session_state["mode"] = "pogruzki"
-            st.rerun()
+        st.button("➡️ Перейти в режим погрузки", on_click=set_state, kwargs={"mode": "pogruzki"})
 
         return  # zayavki uchun qolgan kod kerak emas
 
     # ------------ POGRUZKI MODE ------------
 
-    otvals_df = get_otvals_table()
+    otvals = get_otvals_table()
+    otval_names = [o["name"] for o in otvals]
+    otval_labels = build_otval_labels(otvals)
+
+    # URL dan kelgan yoki o‘chirilgan otval – tanlov bekor qilinadi
+    if selected_otval is not None and selected_otval != OTVAL_JR and selected_otval not in otval_labels:
+        set_state(selected_otval=None)
+        selected_otval = None
 
     # OTVAL TANLASHGAChA: km o‘zgartirish + yangi Хоз. работа + Ж/Р
     if selected_otval is None:
@@ -557,12 +1199,12 @@ def main():
 
         # 1) Masofani o‘zgartirish + jadval + Хоз. работа yaratish
         with st.expander("Указать расстояние до отвала (км) / хоз. работы", expanded=False):
-            if otvals_df.empty:
+            if not otvals:
                 st.info("Отвалов пока нет. Администратор может добавить их в admin panel.")
             else:
                 name_select = st.selectbox(
                     "Выберите отвал для редактирования расстояния",
-                    otvals_df["name"].tolist(),
+                    otval_names,
                     key="hoz_select_name"
                 )
                 len_str = st.text_input(
@@ -584,13 +1226,7 @@ def main():
                             st.rerun()
 
                 st.markdown("##### Текущие отвалы и расстояния")
-                show_df = otvals_df.copy()
-                show_df = show_df.rename(columns={
-                    "id": "ID",
-                    "name": "Отвал",
-                    "length": "Длина, км"
-                })
-                st.dataframe(show_df, use_container_width=True)
+                st.dataframe(otvals, use_container_width=True, column_config=OTVALS_COLUMN_CONFIG)
 
             st.markdown("---")
             st.markdown("**Добавить хоз. работу (как отвал)**")
@@ -624,26 +1260,19 @@ def main():
 
         st.markdown("### Отвалы")
 
-        cols = st.columns(2)
-        for i, row in otvals_df.iterrows():
-            name = row["name"]
-            length = row["length"]
-            if length is not None:
-                label = f"{name} ({length} км)"
-            else:
-                label = name
-            col = cols[i % 2]
-            if col.button(label, use_container_width=True):
-                st.session_state["selected_otval"] = name
-                st.rerun()
+        # Har qator – 2 ta tugma
+        for start in range(0, len(otval_names), 2):
+            for col, name in zip(st.columns(2), otval_names[start:start + 2]):
+                col.button(
+                    otval_labels[name], use_container_width=True,
+                    on_click=set_state, kwargs={"selected_otval": name}
+                )
 
         st.markdown("### Специальные режимы")
 
         sp_cols = st.columns(2)
         with sp_cols[0]:
-            if st.button("Ж/Р", use_container_width=True):
-                st.session_state["selected_otval"] = OTVAL_JR
-                st.rerun()
+            st.button("Ж/Р", use_container_width=True, on_click=set_state, kwargs={"selected_otval": OTVAL_JR})
 
         return
 
@@ -653,430 +1282,26 @@ def main():
     if is_jr:
         otval_label = "Ж/Р"
     else:
-        otval_len = get_otval_length(selected_otval)
-        if otval_len is not None:
-            otval_label = f"{selected_otval} ({otval_len} км)"
-        else:
-            otval_label = selected_otval
+        otval_label = otval_labels.get(selected_otval, selected_otval)
 
     st.markdown(f"**Режим / отвал:** {otval_label}")
     change_otval_col1, change_otval_col2 = st.columns(2)
     with change_otval_col1:
-        if st.button("⏪ Сменить отвал / режим"):
-            st.session_state["selected_otval"] = None
-            st.rerun()
+        st.button("⏪ Сменить отвал / режим", on_click=set_state, kwargs={"selected_otval": None})
     with change_otval_col2:
-        if st.button("📋 Перейти в заявки"):
-            st.session_state["mode"] = "zayavki"
-            st.session_state["selected_otval"] = None
-            st.rerun()
+        st.button("📋 Перейти в заявки", on_click=set_state, kwargs={"mode": "zayavki", "selected_otval": None})
 
     st.divider()
 
     # ========== TABLAR ==========
     tab1, tab2 = st.tabs(["📝 Ввод (для машиниста)", "📊 Общий свод / Admin"])
 
-    # ---------- TAB 1: Vvod ----------
+    # Svod tab – fragment: sana o‘zgarsa faqat shu tab qayta ishlaydi.
+    # Kiritish tab i oddiy: saqlangandan keyin ikkala tab ham yangi ma'lumot ko‘rsatadi
     with tab1:
-        today_str = date.today().strftime("%Y-%m-%d")
-
-        # === 1) Ж/Р rejimi ===
-        if is_jr:
-            st.subheader("Ж/Р – учёт по локомотивам")
-
-            with st.form("jr_form_mach", clear_on_submit=True):
-                col_j1, col_j2 = st.columns(2)
-                with col_j1:
-                    loco = st.text_input("Номер локомотива", placeholder="Например: 001, 23А и т.п.")
-                with col_j2:
-                    vol_str = st.text_input("Объём, м³", placeholder="Например: 120.5")
-
-                jr_submit = st.form_submit_button("💾 Сохранить Ж/Р")
-
-            if jr_submit:
-                loco_clean = loco.strip()
-                vol_clean = vol_str.strip()
-                if not loco_clean or not vol_clean:
-                    st.error("Укажите и номер локомотива, и объём.")
-                else:
-                    try:
-                        vol_val = float(vol_clean.replace(",", "."))
-                    except ValueError:
-                        st.error("Объём должен быть числом.")
-                    else:
-                        insert_jr(loco_clean, vol_val)
-                        st.success("Ж/Р запись сохранена.")
-
-            st.markdown(f"#### Ж/Р за {today_str}")
-            df_jr_today = get_jr_by_day(today_str)
-            if df_jr_today.empty:
-                st.info("Ж/Р записей за сегодня нет.")
-            else:
-                df_jr_view = df_jr_today.copy()
-                df_jr_view = df_jr_view.rename(columns={
-                    "day": "Дата",
-                    "ts": "Время",
-                    "loco": "№ локомотива",
-                    "volume": "Объём, м³",
-                })
-                df_jr_view = df_jr_view[["Дата", "Время", "№ локомотива", "Объём, м³"]]
-                st.dataframe(df_jr_view, use_container_width=True)
-
-        # === 2) Oddiy otval – BelAZ hodkalar ===
-        else:
-            st.subheader(f"Новая ходка — {selected_excavator}, {otval_label}")
-
-            with st.form("hodka_form", clear_on_submit=True):
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    belaz_input = st.text_input(
-                        "Номер БелАЗа",
-                        value="",
-                        placeholder="Например: 201"
-                    )
-
-                with col2:
-                    is_half = st.checkbox("Полупустая (0.5 загрузки)")
-
-                submitted = st.form_submit_button("💾 Сохранить ходку")
-
-            if submitted:
-                belaz_str = belaz_input.strip()
-
-                if not belaz_str:
-                    st.error("Введите номер БелАЗа.")
-                elif not belaz_str.isdigit():
-                    st.error("Номер БелАЗа должен быть числом.")
-                else:
-                    truck_id = int(belaz_str)
-                    volume, error = insert_record(selected_excavator, selected_otval, truck_id, is_half)
-
-                    if error:
-                        st.error("❌ " + error)
-                    else:
-                        st.success(
-                            f"Ходка сохранена: экскаватор {selected_excavator} | отвал: {otval_label} | "
-                            f"БелАЗ №{truck_id} | "
-                            f"{'0.5 загрузки' if is_half else 'полная загрузка'} | "
-                            f"{volume:.2f} м³"
-                        )
-
-            # Mashinist uchun — bugungi hodkalar (faqat BelAZ)
-            st.markdown(f"### Сегодняшние ходки ({today_str}) по экскаватору {selected_excavator}")
-
-            df_ex_today = get_daily_records(today_str, selected_excavator)
-
-            if df_ex_today.empty:
-                st.info("Сегодня пока нет сохранённых ходок для этого экскаватора.")
-            else:
-                df_ex_today = df_ex_today.copy()
-                df_ex_today["xodka"] = range(1, len(df_ex_today) + 1)
-
-                df_ex_view = df_ex_today.rename(columns={
-                    "truck_id": "Номер БелАЗа",
-                    "volume": "Объём, м³",
-                    "day": "Дата",
-                    "ts": "Время",
-                    "excavator": "Экскаватор",
-                    "otval": "Отвал",
-                    "truck_class": "Класс БелАЗа",
-                    "base_volume": "Базовый объём, м³",
-                    "factor": "Коэффициент",
-                    "xodka": "Ходка №",
-                })
-
-                df_ex_view = df_ex_view[
-                    ["Дата", "Время", "Экскаватор", "Отвал", "Номер БелАЗа",
-                     "Класс БелАЗа", "Базовый объём, м³", "Коэффициент", "Объём, м³", "Ходка №"]
-                ]
-                st.dataframe(df_ex_view, use_container_width=True)
-
-    # ---------- TAB 2: Admin / umumiy svod ----------
+        render_input_tab(selected_excavator, selected_otval, otval_label, is_jr)
     with tab2:
-        st.subheader("Общий свод по всем экскаваторам")
-
-        today = date.today()
-        selected_day = st.date_input("Дата свода", value=today, key="master_date")
-        day_str = selected_day.strftime("%Y-%m-%d")
-
-        st.markdown(f"### Дата: **{day_str}**")
-
-        df_all_agg = get_daily_aggregated_all(day_str)
-
-        if df_all_agg.empty:
-            st.info("Нет данных за выбранную дату по всем экскаваторам.")
-        else:
-            df_all_view = df_all_agg.rename(columns={
-                "day": "Дата",
-                "excavator": "Экскаватор",
-                "otval": "Отвал",
-                "truck_id": "Номер БелАЗа",
-                "trips": "Количество ходок",
-                "obem": "Объём, м³",
-            })
-
-            total_trips_all = int(df_all_agg["trips"].sum())
-            total_obem_all = float(df_all_agg["obem"].sum())
-
-            st.markdown("#### Агрегированный свод (день / экскаватор / отвал / БелАЗ)")
-            st.dataframe(df_all_view, use_container_width=True)
-
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.metric("Общее количество ходок (все экскаваторы)", total_trips_all)
-            with col_b:
-                st.metric("Общий объём (м³) по всем экскаваторам", f"{total_obem_all:.2f}")
-
-        st.divider()
-        st.markdown("### 🔐 Admin panel")
-
-        if not is_admin:
-            st.info("Для доступа к admin panel введите верный admin code сверху.")
-            return
-
-        st.success("Админ режим активен.")
-
-        # --- Otvallar bo‘yicha svod ekranda (records) ---
-        st.markdown("#### Свод по отвалам (отвал + экскаватор, объём) для экрана")
-        df_otval_full = get_otval_summary(day_str)
-
-        if df_otval_full.empty:
-            st.info("Нет данных по отвалам за выбранную дату.")
-        else:
-            df_otval_full_view = df_otval_full.rename(columns={
-                "day": "Дата",
-                "otval": "Отвал",
-                "excavator": "Экскаватор",
-                "obem": "Объём, м³",
-                "length": "Длина отвала, км",
-            })
-            st.dataframe(df_otval_full_view, use_container_width=True)
-
-        st.divider()
-        st.markdown("#### 📥 Экспорт отчётов (погрузки / заявки)")
-
-        # --- Pogruzki Excel (BelAZ hodkalar, sana+vaqt bitta ustunda, OTVAL+KM) ---
-        df_details = get_daily_details_all(day_str)
-
-        if df_details.empty:
-            st.info("Нет данных по погрузкам за выбранную дату (для Excel).")
-        else:
-            df_det_view = df_details.copy()
-            # Sana + vaqt bitta ustun
-            df_det_view["Дата/Время"] = df_det_view["ts"]
-
-            # Otvalga km qo'shish uchun otvals bilan merge
-            otvals_df_full = get_otvals_table()
-            if not otvals_df_full.empty:
-                df_det_view = df_det_view.merge(
-                    otvals_df_full.rename(columns={"name": "otval", "length": "_len_km"}),
-                    how="left",
-                    on="otval"
-                )
-            else:
-                df_det_view["_len_km"] = None
-
-            # Отвал nom + (km) formatiga o'zgartiramiz
-            def make_otval_label(row):
-                if pd.isna(row["_len_km"]):
-                    return row["otval"]
-                return f'{row["otval"]} ({row["_len_km"]} км)'
-
-            df_det_view["Отвал"] = df_det_view.apply(make_otval_label, axis=1)
-
-            df_det_view = df_det_view.rename(columns={
-                "excavator": "Экскаватор",
-                "truck_id": "Номер БелАЗа",
-                "truck_class": "Класс БелАЗа",
-                "base_volume": "Базовый объём, м³",
-                "factor": "Коэффициент",
-                "volume": "Объём, м³",
-            })
-
-            df_det_view = df_det_view[
-                ["Дата/Время", "Экскаватор", "Отвал", "Номер БелАЗа",
-                 "Класс БелАЗа", "Базовый объём, м³", "Коэффициент", "Объём, м³"]
-            ]
-
-            total_obem_det = df_det_view["Объём, м³"].sum()
-            total_row = {
-                "Дата/Время": "",
-                "Экскаватор": "УТТ",  # umumiy
-                "Отвал": "",
-                "Номер БелАЗа": "",
-                "Класс БелАЗа": "",
-                "Базовый объём, м³": "",
-                "Коэффициент": "",
-                "Объём, м³": total_obem_det,
-            }
-            df_det_view_total = pd.concat(
-                [df_det_view, pd.DataFrame([total_row])],
-                ignore_index=True
-            )
-
-            # --- Отвалы sheet: records (shuningdek хоз. работа otvallari) ---
-            if not df_otval_full.empty:
-                otval_df_simple = (
-                    df_otval_full
-                    .groupby("otval", as_index=False)["obem"]
-                    .sum()
-                )
-                otval_df_view = otval_df_simple.rename(columns={
-                    "otval": "Отвал",
-                    "obem": "Объём, м³",
-                })
-                total_row_otval = {
-                    "Отвал": "УТТ",
-                    "Объём, м³": otval_df_view["Объём, м³"].sum(),
-                }
-                otval_df_view = pd.concat(
-                    [otval_df_view, pd.DataFrame([total_row_otval])],
-                    ignore_index=True
-                )
-            else:
-                otval_df_view = pd.DataFrame(columns=["Отвал", "Объём, м³"])
-
-            # --- Ж/Р jadvali (alohida, UTT ga qo‘shilmaydi) ---
-            df_jr_day = get_jr_by_day(day_str)
-            if df_jr_day.empty:
-                jr_view = pd.DataFrame(columns=["Ж/Р", "№ локомотива", "Объём, м³"])
-            else:
-                jr_view = df_jr_day.copy()
-                jr_view = jr_view.rename(columns={
-                    "loco": "№ локомотива",
-                    "volume": "Объём, м³",
-                })
-                jr_view["Ж/Р"] = "Ж/Р"
-                jr_view = jr_view[["Ж/Р", "№ локомотива", "Объём, м³"]]
-
-            output_pog = BytesIO()
-            with pd.ExcelWriter(output_pog, engine="xlsxwriter") as writer:
-                # Sheet 1 – Ходки
-                df_det_view_total.to_excel(writer, index=False, sheet_name="Ходки")
-
-                # Sheet 2 – Отвалы (+ Ж/Р pastda)
-                otval_df_view.to_excel(writer, index=False, sheet_name="Отвалы")
-
-                if not jr_view.empty:
-                    startrow = len(otval_df_view) + 3
-                    jr_view.to_excel(
-                        writer,
-                        index=False,
-                        sheet_name="Отвалы",
-                        startrow=startrow
-                    )
-
-            st.download_button(
-                label="⬇️ Скачать Excel погрузок",
-                data=output_pog.getvalue(),
-                file_name=f"belaz_pogruzki_{day_str}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_pogruzki"
-            )
-
-        # --- Zayavki Excel ---
-        df_req_all = get_requests_by_day(day_str)
-
-        if df_req_all.empty:
-            st.info("Нет заявок за выбранную дату (для Excel).")
-        else:
-            df_req_all_view = df_req_all.copy()
-            df_req_all_view = df_req_all_view.rename(columns={
-                "day": "Дата",
-                "ts": "Время",
-                "excavator": "Экскаватор",
-                "text": "Заявка",
-            })
-            df_req_all_view = df_req_all_view[["Дата", "Время", "Экскаватор", "Заявка"]]
-
-            output_zay = BytesIO()
-            with pd.ExcelWriter(output_zay, engine="xlsxwriter") as writer:
-                df_req_all_view.to_excel(writer, index=False, sheet_name="Заявки")
-
-            st.download_button(
-                label="⬇️ Скачать Excel заявок",
-                data=output_zay.getvalue(),
-                file_name=f"belaz_zayavki_{day_str}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_zayavki"
-            )
-
-        st.divider()
-
-        # --- OTVAL MANAGEMENT (faqat admin) ---
-        st.markdown("#### Управление отвалами")
-
-        df_otvals_table = get_otvals_table()
-        st.dataframe(df_otvals_table.rename(columns={
-            "id": "ID",
-            "name": "Отвал",
-            "length": "Длина, км"
-        }), use_container_width=True)
-
-        st.markdown("**Добавить / обновить отвал (Admin)**")
-
-        names_list = df_otvals_table["name"].tolist()
-        special_new = "— Новый отвал —"
-        select_options = [special_new] + names_list
-
-        sel_for_edit = st.selectbox(
-            "Выберите существующий отвал или «Новый отвал»",
-            select_options,
-            key="admin_otval_select"
-        )
-
-        new_len_input_admin = st.text_input(
-            "Длина отвала (км, можно пусто)",
-            key="new_otval_len_admin",
-            placeholder="Например: 3.2"
-        )
-
-        if sel_for_edit == special_new:
-            new_otval_name_admin = st.text_input(
-                "Название нового отвала",
-                key="new_otval_name_admin",
-                placeholder="Например: МОФ-5",
-            )
-        else:
-            new_otval_name_admin = sel_for_edit  # bor otval nomi
-
-        add_col, del_col = st.columns(2)
-
-        with add_col:
-            if st.button("💾 Сохранить (добавить/обновить) отвал", key="admin_save_otval"):
-                name = new_otval_name_admin.strip()
-                if not name:
-                    st.error("Название отвала обязательно.")
-                else:
-                    if new_len_input_admin.strip() == "":
-                        length_val = None
-                    else:
-                        try:
-                            length_val = float(new_len_input_admin.replace(",", "."))
-                        except ValueError:
-                            st.error("Длина должна быть числом (например 3.2).")
-                            length_val = None
-
-                    if new_len_input_admin.strip() == "" or length_val is not None:
-                        upsert_otval(name, length_val)
-                        st.success("Отвал сохранён (Admin).")
-                        st.rerun()
-
-        with del_col:
-            st.markdown("**Удалить отвал**")
-            if df_otvals_table.empty:
-                st.write("Отвалов нет.")
-            else:
-                del_name = st.selectbox(
-                    "Выберите отвал для удаления",
-                    df_otvals_table["name"].tolist(),
-                    key="delete_otval_select"
-                )
-                if st.button("🗑 Удалить отвал", type="secondary", key="btn_del_otval"):
-                    delete_otval(del_name)
-                    st.warning(f"Отвал «{del_name}» удалён. История в записях сохранена.")
-                    st.rerun()
+        render_summary_tab(is_admin, otvals, otval_names)
 
 
 if __name__ == "__main__":